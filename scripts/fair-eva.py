@@ -21,231 +21,282 @@ repo = "oai-pmh"
 """
 
 import argparse
+import atexit
+import csv
 import json
 import logging
+import os
+import pathlib
 import socket
 import sys
 import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from typing import Dict, List
 
 import requests
-from flask_babel import Babel, gettext
-from flask_babel import lazy_gettext as _l
-from prettytable import PrettyTable
-
-FAIR_PRINCIPLES = ["findable", "accessible", "interoperable", "reusable"]
-
-FAIR_RDA_INDICATORS = {
-    "RDA_F1_01M": {
-        "id": "RDA-F1-01M",
-        "indicator": "Metadata is identified by a persistent identifier",
-        "priority": "Essential (***)",
-    },
-    "RDA_F1_01D": {
-        "id": "RDA-F1-01D",
-        "indicator": "Data is identified by a persistent identifier",
-        "priority": "Essential (***)",
-    },
-    "RDA_F1_02M": {
-        "id": "RDA-F1-02M",
-        "indicator": "Metadata is identified by a globally unique identifier",
-        "priority": "Essential (***)",
-    },
-    "RDA_F1_02D": {
-        "id": "RDA-F1-02D",
-        "indicator": "Data is identified by a persistent identifier",
-        "priority": "Essential (***)",
-    },
-    "RDA_F2_01M": {
-        "id": "RDA-F2-01M",
-        "indicator": "Rich metadata is provided to allow discovery",
-        "priority": "Essential (***)",
-    },
-    "RDA_F3_01M": {
-        "id": "RDA-F3-01M",
-        "indicator": "Metadata includes the identifier for the data",
-        "priority": "Essential (***)",
-    },
-    "RDA_F4_01M": {
-        "id": "RDA-F4-01M",
-        "indicator": "Metadata is offered in such a way that it can be harvested and indexed",
-        "priority": "Essential (***)",
-    },
-    "RDA_A1_01M": {
-        "id": "RDA-A1-01M",
-        "indicator": "Metadata contains information to enable the user to get access to the data",
-        "priority": "Important (**)",
-    },
-    "RDA_A1_02M": {
-        "id": "RDA-A1-02M",
-        "indicator": "Metadata can be accessed manually (i.e. with human intervention)",
-        "priority": "Essential (***)",
-    },
-    "RDA_A1_02D": {
-        "id": "RDA-A1-02D",
-        "indicator": "Data can be accessed manually (i.e. with human intervention)",
-        "priority": "Essential (***)",
-    },
-    "RDA_A1_03M": {
-        "id": "RDA-A1-03M",
-        "indicator": "Metadata identifier resolves to a metadata record",
-        "priority": "Essential (***)",
-    },
-    "RDA_A1_02D": {
-        "id": "RDA-A1-02D",
-        "indicator": "Data can be accessed manually (i.e. with human intervention)",
-        "priority": "Essential (***)",
-    },
-    "RDA_A1_03D": {
-        "id": "RDA-A1-03D",
-        "indicator": "Data identifier resolves to a digital object",
-        "priority": "Essential (***)",
-    },
-    "RDA_A1_04M": {
-        "id": "RDA-A1-04M",
-        "indicator": "Metadata is accessed through standardised protocol",
-        "priority": "Essential (***)",
-    },
-    "RDA_A1_04D": {
-        "id": "RDA-A1-04D",
-        "indicator": "Data is accessed through standardised protocol",
-        "priority": "Essential (***)",
-    },
-    "RDA_A1_05D": {
-        "id": "RDA-A1-05D",
-        "indicator": "Data can be accessed automatically (i.e. by a computer program)",
-        "priority": "Important (**)",
-    },
-    "RDA_A1_1_01M": {
-        "id": "RDA-A1.1-01M",
-        "indicator": "Metadata is accessible through a free access protocol",
-        "priority": "Essential (***)",
-    },
-    "RDA_A1_1_01D": {
-        "id": "RDA-A1.1-01D",
-        "indicator": "Data is accessible through a free access protocol",
-        "priority": "Important (**)",
-    },
-    "RDA_A1_2_01D": {
-        "id": "RDA-A1.2-01D",
-        "indicator": "Data is accessible through an access protocol that supports authentication and authorisation",
-        "priority": "Useful (*)",
-    },
-    "RDA_A2_01M": {
-        "id": "RDA-A2-01M",
-        "indicator": "Metadata is guaranteed to remain available after data is no longer available",
-        "priority": "Essential (***)",
-    },
-    "RDA_I1_01M": {
-        "id": "RDA-I1-01M",
-        "indicator": "Metadata uses knowledge representation expressed in standardised format",
-        "priority": "Important (**)",
-    },
-    "RDA_I1_01D": {
-        "id": "RDA-I1-01D",
-        "indicator": "Data uses knowledge representation expressed in standardised format",
-        "priority": "Important (**)",
-    },
-    "RDA_I1_02M": {
-        "id": "RDA-I1-02M",
-        "indicator": "Metadata uses machine-understandable knowledge representation",
-        "priority": "Important (**)",
-    },
-    "RDA_I1_02D": {
-        "id": "RDA-I1-02D",
-        "indicator": "Data uses machine-understandable knowledge representation",
-        "priority": "Important (**)",
-    },
-    "RDA_I2_01M": {
-        "id": "RDA-I2-01M",
-        "indicator": "Metadata uses FAIR-compliant vocabularies",
-        "priority": "Important (**)",
-    },
-    "RDA_I2_01D": {
-        "id": "RDA-I2-01D",
-        "indicator": "Data uses FAIR-compliant vocabularies",
-        "priority": "Useful (*)",
-    },
-    "RDA_I3_01M": {
-        "id": "RDA-I3-01M",
-        "indicator": "Metadata includes references to other metadata",
-        "priority": "Important (**)",
-    },
-    "RDA_I3_01D": {
-        "id": "RDA-I3-01D",
-        "indicator": "Data includes references to other data",
-        "priority": "Useful (*)",
-    },
-    "RDA_I3_02M": {
-        "id": "RDA-I3-02M",
-        "indicator": "Metadata includes references to other data",
-        "priority": "Important (**)",
-    },
-    "RDA_I3_02D": {
-        "id": "RDA-I3-02D",
-        "indicator": "Data includes qualified references to other data",
-        "priority": "Useful (*)",
-    },
-    "RDA_I3_03M": {
-        "id": "RDA-I3-03M",
-        "indicator": "Metadata includes qualified references to other metadata",
-        "priority": "Important (**)",
-    },
-    "RDA_I3_04M": {
-        "id": "RDA-I3-04M",
-        "indicator": "Metadata includes qualified references to other data",
-        "priority": "Useful (*)",
-    },
-    "RDA_R1_01M": {
-        "id": "RDA-R1-01M",
-        "indicator": "Plurality of accurate and relevant attributes are provided to allow reuse",
-        "priority": "Essential (***)",
-    },
-    "RDA_R1_1_01M": {
-        "id": "RDA-R1.1-01M",
-        "indicator": "Metadata includes information about the licence under which the data can be reused",
-        "priority": "Essential (***)",
-    },
-    "RDA_R1_1_02M": {
-        "id": "RDA-R1.1-02M",
-        "indicator": "Metadata refers to a standard reuse licence",
-        "priority": "Important (**)",
-    },
-    "RDA_R1_1_03M": {
-        "id": "RDA-R1.1-03M",
-        "indicator": "Metadata refers to a machine understandable reuse licence",
-        "priority": "Important (**)",
-    },
-    "RDA_R1_2_01M": {
-        "id": "RDA-R1.2-01M",
-        "indicator": "Metadata includes provenance information according to community-specific standards",
-        "priority": "Important (**)",
-    },
-    "RDA_R1_2_02M": {
-        "id": "RDA-R1.2-02M",
-        "indicator": "Metadata includes provenance information according to a cross-community language",
-        "priority": "Useful (*)",
-    },
-    "RDA_R1_3_01M": {
-        "id": "RDA-R1.3-01M",
-        "indicator": "Metadata complies with a community standard",
-        "priority": "Essential (***)",
-    },
-    "RDA_R1_3_01D": {
-        "id": "RDA-R1.3-01D",
-        "indicator": "Data complies with a community standard",
-        "priority": "Essential (***)",
-    },
-    "RDA_R1_3_02M": {
-        "id": "RDA-R1.3-02M",
-        "indicator": "Metadata is expressed in compliance with a machine-understandable community standard",
-        "priority": "Essential (***)",
-    },
-    "RDA_R1_3_02D": {
-        "id": "RDA-R1.3-02D",
-        "indicator": "Data is expressed in compliance with a machine-understandable community standard",
-        "priority": "Important (**)",
-    },
-}
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Use a fast JSON codec when available
+try:
+    import orjson as json_codec
+except ImportError:
+    try:
+        import ujson as json_codec
+    except ImportError:
+        json_codec = json
+
+# Only decode the needed parts of the FAIR-EVA API responses when available
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# Scores are shown truncated to two decimals
+format_score = "{:.2f}".format
+
+# Time (in seconds) the plugin's metadata endpoint is kept in the local cache
+ENDPOINTS_CACHE_TTL = 3600
+
+FAIR_PRINCIPLES = ("findable", "accessible", "interoperable", "reusable")
+
+Indicator = namedtuple("Indicator", "id indicator priority")
+
+FAIR_RDA_INDICATORS = MappingProxyType(
+    {
+        "RDA_F1_01M": Indicator(
+            "RDA-F1-01M",
+            "Metadata is identified by a persistent identifier",
+            "Essential (***)",
+        ),
+        "RDA_F1_01D": Indicator(
+            "RDA-F1-01D",
+            "Data is identified by a persistent identifier",
+            "Essential (***)",
+        ),
+        "RDA_F1_02M": Indicator(
+            "RDA-F1-02M",
+            "Metadata is identified by a globally unique identifier",
+            "Essential (***)",
+        ),
+        "RDA_F1_02D": Indicator(
+            "RDA-F1-02D",
+            "Data is identified by a persistent identifier",
+            "Essential (***)",
+        ),
+        "RDA_F2_01M": Indicator(
+            "RDA-F2-01M",
+            "Rich metadata is provided to allow discovery",
+            "Essential (***)",
+        ),
+        "RDA_F3_01M": Indicator(
+            "RDA-F3-01M",
+            "Metadata includes the identifier for the data",
+            "Essential (***)",
+        ),
+        "RDA_F4_01M": Indicator(
+            "RDA-F4-01M",
+            "Metadata is offered in such a way that it can be harvested and indexed",
+            "Essential (***)",
+        ),
+        "RDA_A1_01M": Indicator(
+            "RDA-A1-01M",
+            "Metadata contains information to enable the user to get access to the data",
+            "Important (**)",
+        ),
+        "RDA_A1_02M": Indicator(
+            "RDA-A1-02M",
+            "Metadata can be accessed manually (i.e. with human intervention)",
+            "Essential (***)",
+        ),
+        "RDA_A1_02D": Indicator(
+            "RDA-A1-02D",
+            "Data can be accessed manually (i.e. with human intervention)",
+            "Essential (***)",
+        ),
+        "RDA_A1_03M": Indicator(
+            "RDA-A1-03M",
+            "Metadata identifier resolves to a metadata record",
+            "Essential (***)",
+        ),
+        "RDA_A1_03D": Indicator(
+            "RDA-A1-03D",
+            "Data identifier resolves to a digital object",
+            "Essential (***)",
+        ),
+        "RDA_A1_04M": Indicator(
+            "RDA-A1-04M",
+            "Metadata is accessed through standardised protocol",
+            "Essential (***)",
+        ),
+        "RDA_A1_04D": Indicator(
+            "RDA-A1-04D",
+            "Data is accessed through standardised protocol",
+            "Essential (***)",
+        ),
+        "RDA_A1_05D": Indicator(
+            "RDA-A1-05D",
+            "Data can be accessed automatically (i.e. by a computer program)",
+            "Important (**)",
+        ),
+        "RDA_A1_1_01M": Indicator(
+            "RDA-A1.1-01M",
+            "Metadata is accessible through a free access protocol",
+            "Essential (***)",
+        ),
+        "RDA_A1_1_01D": Indicator(
+            "RDA-A1.1-01D",
+            "Data is accessible through a free access protocol",
+            "Important (**)",
+        ),
+        "RDA_A1_2_01D": Indicator(
+            "RDA-A1.2-01D",
+            "Data is accessible through an access protocol that supports authentication and authorisation",
+            "Useful (*)",
+        ),
+        "RDA_A2_01M": Indicator(
+            "RDA-A2-01M",
+            "Metadata is guaranteed to remain available after data is no longer available",
+            "Essential (***)",
+        ),
+        "RDA_I1_01M": Indicator(
+            "RDA-I1-01M",
+            "Metadata uses knowledge representation expressed in standardised format",
+            "Important (**)",
+        ),
+        "RDA_I1_01D": Indicator(
+            "RDA-I1-01D",
+            "Data uses knowledge representation expressed in standardised format",
+            "Important (**)",
+        ),
+        "RDA_I1_02M": Indicator(
+            "RDA-I1-02M",
+            "Metadata uses machine-understandable knowledge representation",
+            "Important (**)",
+        ),
+        "RDA_I1_02D": Indicator(
+            "RDA-I1-02D",
+            "Data uses machine-understandable knowledge representation",
+            "Important (**)",
+        ),
+        "RDA_I2_01M": Indicator(
+            "RDA-I2-01M",
+            "Metadata uses FAIR-compliant vocabularies",
+            "Important (**)",
+        ),
+        "RDA_I2_01D": Indicator(
+            "RDA-I2-01D",
+            "Data uses FAIR-compliant vocabularies",
+            "Useful (*)",
+        ),
+        "RDA_I3_01M": Indicator(
+            "RDA-I3-01M",
+            "Metadata includes references to other metadata",
+            "Important (**)",
+        ),
+        "RDA_I3_01D": Indicator(
+            "RDA-I3-01D",
+            "Data includes references to other data",
+            "Useful (*)",
+        ),
+        "RDA_I3_02M": Indicator(
+            "RDA-I3-02M",
+            "Metadata includes references to other data",
+            "Important (**)",
+        ),
+        "RDA_I3_02D": Indicator(
+            "RDA-I3-02D",
+            "Data includes qualified references to other data",
+            "Useful (*)",
+        ),
+        "RDA_I3_03M": Indicator(
+            "RDA-I3-03M",
+            "Metadata includes qualified references to other metadata",
+            "Important (**)",
+        ),
+        "RDA_I3_04M": Indicator(
+            "RDA-I3-04M",
+            "Metadata includes qualified references to other data",
+            "Useful (*)",
+        ),
+        "RDA_R1_01M": Indicator(
+            "RDA-R1-01M",
+            "Plurality of accurate and relevant attributes are provided to allow reuse",
+            "Essential (***)",
+        ),
+        "RDA_R1_1_01M": Indicator(
+            "RDA-R1.1-01M",
+            "Metadata includes information about the licence under which the data can be reused",
+            "Essential (***)",
+        ),
+        "RDA_R1_1_02M": Indicator(
+            "RDA-R1.1-02M",
+            "Metadata refers to a standard reuse licence",
+            "Important (**)",
+        ),
+        "RDA_R1_1_03M": Indicator(
+            "RDA-R1.1-03M",
+            "Metadata refers to a machine understandable reuse licence",
+            "Important (**)",
+        ),
+        "RDA_R1_2_01M": Indicator(
+            "RDA-R1.2-01M",
+            "Metadata includes provenance information according to community-specific standards",
+            "Important (**)",
+        ),
+        "RDA_R1_2_02M": Indicator(
+            "RDA-R1.2-02M",
+            "Metadata includes provenance information according to a cross-community language",
+            "Useful (*)",
+        ),
+        "RDA_R1_3_01M": Indicator(
+            "RDA-R1.3-01M",
+            "Metadata complies with a community standard",
+            "Essential (***)",
+        ),
+        "RDA_R1_3_01D": Indicator(
+            "RDA-R1.3-01D",
+            "Data complies with a community standard",
+            "Essential (***)",
+        ),
+        "RDA_R1_3_02M": Indicator(
+            "RDA-R1.3-02M",
+            "Metadata is expressed in compliance with a machine-understandable community standard",
+            "Essential (***)",
+        ),
+        "RDA_R1_3_02D": Indicator(
+            "RDA-R1.3-02D",
+            "Data is expressed in compliance with a machine-understandable community standard",
+            "Important (**)",
+        ),
+    }
+)
+
+
+def get_session():
+    """Returns a requests session with connection pooling and retries.
+
+    The same session is reused for all the HTTP requests performed by the
+    script (FAIR-EVA API and metadata endpoint), so that connections are kept
+    alive between calls.
+    """
+    session = requests.Session()
+    session.headers.update({"accept": "application/json"})
+    adapter = HTTPAdapter(
+        pool_connections=20,
+        pool_maxsize=20,
+        max_retries=Retry(total=3, backoff_factor=0.3),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    atexit.register(session.close)
+
+    return session
+
+
+SESSION = get_session()
 
 
 class Formatter(logging.Formatter):
@@ -324,43 +375,103 @@ def get_input_args():
         action="store_true",
         help=("Store FAIR results as CSV format"),
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=("Do not use nor update the local cache of plugin endpoints"),
+    )
 
     return parser.parse_args()
 
 
-def is_port_open():
-    is_port_open = False
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    result = sock.connect_ex(("127.0.0.1", 9090))
-    if result == 0:
-        is_port_open = True
-    sock.close()
+def is_port_open(host="127.0.0.1", port=9090, timeout=0.2):
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def wait_for_port(host="127.0.0.1", port=9090, max_wait=2.0):
+    """Waits until the given port accepts connections, with exponential backoff.
+
+    Returns True as soon as a connection succeeds, False if the port is still
+    closed after max_wait seconds.
+    """
+    deadline = time.monotonic() + max_wait
+    delay = 0.05
+    while True:
+        if is_port_open(host, port):
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        logging.debug(
+            "FAIR-eva API not running: port %s not open. Retrying in %.2f seconds.."
+            % (port, min(delay, remaining))
+        )
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 0.5)
 
-    return is_port_open
 
+def get_endpoint_cache_file(plugin):
+    cache_dir = pathlib.Path(
+        os.environ.get("XDG_CACHE_HOME") or pathlib.Path.home() / ".cache"
+    )
+    return cache_dir / "fair-eva" / ("endpoints-%s.json" % plugin)
 
-def calcpoints(result):
-    keys = FAIR_PRINCIPLES + ["total"]
-    values = [0, 0, 0, 0, 0]
-    result_points = 0
-    weight_of_tests = 0
-    points = dict(zip(keys, values))
-
-    for key in keys[:-1]:
-        g_weight = 0
-        g_points = 0
-        for kk in result[key]:
-            result[key][kk]["indicator"] = gettext(
-                "%s.indicator" % result[key][kk]["name"]
-            )
 
-            result[key][kk]["name_smart"] = gettext("%s" % result[key][kk]["name"])
+def read_cached_endpoint(plugin):
+    """Returns the cached metadata endpoint for the plugin.
+
+    None is returned if there is no valid cache entry or it is older than
+    ENDPOINTS_CACHE_TTL.
+    """
+    cache_file = get_endpoint_cache_file(plugin)
+    try:
+        if time.time() - cache_file.stat().st_mtime >= ENDPOINTS_CACHE_TTL:
+            return None
+        endpoint = json.loads(cache_file.read_text())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(endpoint, str):
+        return None
+
+    return endpoint
 
-            weight = result[key][kk]["score"]["weight"]
-            weight_of_tests += weight
-            g_weight += weight
-            result_points += result[key][kk]["points"] * weight
-            g_points += result[key][kk]["points"] * weight
+
+def write_cached_endpoint(plugin, endpoint):
+    cache_file = get_endpoint_cache_file(plugin)
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        cache_file.write_text(json.dumps(endpoint))
+    except OSError as e:
+        logging.debug("Could not cache endpoint for plugin %s: %s" % (plugin, e))
+
+
+def calcpoints(result: dict) -> Dict[str, float]:
+    import numpy as np
+
+    result_points = 0
+    weight_of_tests = 0
+    points = {}
+
+    for key in FAIR_PRINCIPLES:
+        indicator_results = result[key].values()
+        weights = np.fromiter(
+            (indicator["score"]["weight"] for indicator in indicator_results),
+            dtype=np.float64,
+            count=len(indicator_results),
+        )
+        scores = np.fromiter(
+            (indicator["points"] for indicator in indicator_results),
+            dtype=np.float64,
+            count=len(indicator_results),
+        )
+        g_points = float(np.dot(weights, scores))
+        g_weight = float(weights.sum())
+        result_points += g_points
+        weight_of_tests += g_weight
 
         points[key] = round((g_points / g_weight), 3)
     points["total"] = round((result_points / weight_of_tests), 2)
@@ -368,52 +479,51 @@ def calcpoints(result):
     return points
 
 
-def format_msg_for_table(message_data):
-    output_message = "Not available"
-    # FIXME Check to overcome issue: https://github.com/EOSC-synergy/FAIR_eva/issues/188
-    if isinstance(message_data, str):
-        output_message = message_data
-    elif isinstance(message_data, dict):
-        output_message = str(message_data)
-    else:
-        if len(message_data) > 0:
-            # FIXME Overcome same issue as above: https://github.com/EOSC-synergy/FAIR_eva/issues/188
-            if isinstance(message_data[0], str):
-                output_message = "\n".join(message_data)
-            else:
-                if len(message_data) > 1:
-                    output_message = "\n".join(
-                        [
-                            "%s (points: %s)" % (item["message"], item["points"])
-                            for item in message_data
-                        ]
-                    )
-                elif len(message_data) == 1:
-                    output_message = message_data[0].get("message", "Not available")
-    return output_message
-
-
-def collect_score_data(fair_results):
-    # Split by principle: required for setting dividers in the resultant table
-    indicators_by_principle = {}
-    for principle in FAIR_PRINCIPLES:
-        principle_result = fair_results[principle]
-        indicators_by_principle[principle] = list(principle_result.values())
+def _format_msg_list(message_data):
+    if len(message_data) == 0:
+        return "Not available"
+    # FIXME Overcome issue: https://github.com/EOSC-synergy/FAIR_eva/issues/188
+    if isinstance(message_data[0], str):
+        return "\n".join(message_data)
+    if len(message_data) > 1:
+        return "\n".join(
+            [
+                "%s (points: %s)" % (item["message"], item["points"])
+                for item in message_data
+            ]
+        )
+    return message_data[0].get("message", "Not available")
+
 
+# FIXME Check to overcome issue: https://github.com/EOSC-synergy/FAIR_eva/issues/188
+_FORMAT_MSG_BY_TYPE = {
+    str: str,
+    dict: str,
+    list: _format_msg_list,
+    tuple: _format_msg_list,
+}
+
+
+def format_msg_for_table(message_data) -> str:
+    return _FORMAT_MSG_BY_TYPE.get(type(message_data), _format_msg_list)(message_data)
+
+
+def collect_score_data(fair_results: dict) -> List[list]:
     rows = []
-    for principle, indicator_list in indicators_by_principle.items():
-        for indicator_result in indicator_list:
+    _format_msg = format_msg_for_table
+    # Rows are sorted by principle: required for setting dividers in the resultant table
+    for principle in FAIR_PRINCIPLES:
+        for indicator_result in fair_results[principle].values():
             # Format output message
-            output_message = format_msg_for_table(indicator_result.get("msg", []))
+            output_message = _format_msg(indicator_result.get("msg", []))
             # Truncate points to two decimals
             points = indicator_result["points"]
-            if isinstance(points, float):
-                points = "%.2f" % points
-            indicator_id_internal = indicator_result["name"].upper()
-            indicator_rda_data = FAIR_RDA_INDICATORS[indicator_id_internal]
+            if type(points) is float:
+                points = format_score(points)
+            rda_indicator = FAIR_RDA_INDICATORS[indicator_result["name"].upper()]
             row = [
-                indicator_rda_data["id"],
-                indicator_rda_data["indicator"],
+                rda_indicator.id,
+                rda_indicator.indicator,
                 points,
                 output_message,
             ]
@@ -423,11 +533,13 @@ def collect_score_data(fair_results):
 
 
 def print_table(indicator_rows, totals={}):
+    from prettytable import PrettyTable
+
     table = PrettyTable()
     table.field_names = ["ID", "Indicator", "Score", "Output"]
     table.align = "l"
     table._max_width = {"Indicator": 40, "Output": 60}
-    table.add_rows([row for row in indicator_rows])
+    table.add_rows(indicator_rows)
 
     # Printing out totals
     if totals:
@@ -444,8 +556,8 @@ def print_table(indicator_rows, totals={}):
             principle_count += 1
             if principle_count == principle_len:
                 has_divider = True
-            if isinstance(principle_score, float):
-                principle_score = "%.2f" % principle_score
+            if type(principle_score) is float:
+                principle_score = format_score(principle_score)
             table_summary.add_row(
                 [principle_name.capitalize(), principle_score], divider=has_divider
             )
@@ -457,24 +569,23 @@ def print_table(indicator_rows, totals={}):
 
 
 def search(keytext):
+    from prettytable import PrettyTable
+
     args = get_input_args()
     max_tries = 5
-    headers = {
-        "accept": "application/json",
-    }
     good = 0
     params = {"facets": "false", "q": keytext}
     if args.plugin in ["epos", "epos_prod"]:
-        response = requests.get(
+        response = SESSION.get(
             metadata_endpoint + "/resources/search",
             params=params,
-            headers=headers,
         )
-        terms = response.json()
+        terms = json_codec.loads(response.content)
         if not terms.get("results", {}):
             logging.error("Could not find results for search query: %s" % params)
             sys.exit(-2)
-        number_of_items = len(terms["results"]["distributions"])
+        distributions = terms["results"].get("distributions", [])
+        number_of_items = len(distributions)
         table = PrettyTable()
         table.field_names = [
             "Title",
@@ -482,39 +593,31 @@ def search(keytext):
         ]
         table.align = "l"
         table._max_width = {"Output": 100}
-        for index in range((len(terms["results"]["distributions"]))):
-            if (index + 1) % 5 == 0:
-                div = True
-            else:
-                div = False
+        for index, distribution in enumerate(distributions):
             table.add_row(
                 [
-                    terms["results"]["distributions"][index]["title"],
+                    distribution["title"],
                     index,
                 ],
-                divider=div,
+                divider=((index + 1) % 5 == 0),
             )
         print(table)
         for j in range(max_tries):
             ind = input(
                 "Please choose the index of the item you want to evaluate (from 0 to %s): "
-                % str(len(terms["results"]["distributions"]) - 1)
-            )
-            try:
-                if int(ind) > (-1) and int(ind) < number_of_items:
-                    good = 1
-            except:
-                print(
-                    "Please introduce an integer between 0 and " + str(number_of_items)
-                )
-            if good == 1:
+                % str(number_of_items - 1)
+            ).strip()
+            if ind.isdecimal() and int(ind) < number_of_items:
+                good = 1
                 break
+            print(
+                "Please introduce an integer between 0 and %d" % (number_of_items - 1)
+            )
         if good == 0:
             print("Max tries, restart program")
-            return ()
-        global title
-        title = terms["results"]["distributions"][int(ind)]["title"]
-        return terms["results"]["distributions"][int(ind)]["id"]
+            sys.exit(-1)
+        distribution = distributions[int(ind)]
+        return distribution["title"], distribution["id"]
 
     else:
         logging.info(
@@ -523,16 +626,39 @@ def search(keytext):
         sys.exit()
 
 
-def store(identifier, score_data, file_format="feather", path="/tmp"):
-    import os.path
+def parse_results(response, identifier, with_logs=False):
+    """Returns the FAIR results for the identifier and the evaluator logs.
+
+    If msgspec is installed, the top-level items of the response are kept as
+    raw JSON and only the requested ones are decoded.
+    """
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug(
+            "FAIR results (raw) from FAIR-EVA: %s" % json_codec.loads(response.content)
+        )
+    results = {}
+    evaluator_logs = []
+    if msgspec is not None:
+        results_all = msgspec.json.decode(response.content, type=Dict[str, msgspec.Raw])
+        # Results are decoded as plain dicts and not typed structs: indicator
+        # messages come in several shapes and --json prints them as received
+        if identifier in results_all:
+            results = msgspec.json.decode(results_all[identifier])
+        if with_logs and "evaluator_logs" in results_all:
+            evaluator_logs = msgspec.json.decode(results_all["evaluator_logs"])
+    else:
+        results_all = json_codec.loads(response.content)
+        results = results_all.get(identifier, {})
+        if with_logs:
+            evaluator_logs = results_all.get("evaluator_logs", [])
+
+    return results, evaluator_logs
 
-    import pandas as pd
 
-    dframe = pd.DataFrame(score_data)
-    dframe.columns = ["fair_indicator", "fair_principle", "score", "message"]
-    dframe["score"] = pd.to_numeric(dframe["score"])
-    logging.debug("Resultant Pandas data frame: %s" % dframe)
+STORE_COLUMNS = ["fair_indicator", "fair_principle", "score", "message"]
 
+
+def store(identifier, score_data, file_format="feather", path="/tmp"):
     file_name = "fair_eva_results-%s.%s" % (identifier, file_format)
     file_path = os.path.join(path, file_name)
     if file_format not in ["feather", "csv"]:
@@ -540,10 +666,35 @@ def store(identifier, score_data, file_format="feather", path="/tmp"):
         sys.exit(-1)
     else:
         logging.debug("Requested %s output format" % file_format)
+        # Keep integer scores as such when there are no decimal ones, as pandas did
+        if all(type(row[2]) is int for row in score_data):
+            scores = [row[2] for row in score_data]
+        else:
+            scores = [float(row[2]) for row in score_data]
         if file_format in ["feather"]:
-            dframe.to_feather(file_path)
+            import pyarrow as pa
+            import pyarrow.feather as feather
+
+            table = pa.table(
+                [
+                    [row[0] for row in score_data],
+                    [row[1] for row in score_data],
+                    pa.array(scores),
+                    [row[3] for row in score_data],
+                ],
+                names=STORE_COLUMNS,
+            )
+            logging.debug("Resultant Arrow table: %s" % table)
+            feather.write_feather(table, file_path)
         elif file_format in ["csv"]:
-            dframe.to_csv(file_path)
+            with open(file_path, "w", newline="", encoding="utf-8") as csv_file:
+                writer = csv.writer(csv_file, lineterminator="\n")
+                # First column holds the row index, as previously written by pandas
+                writer.writerow([""] + STORE_COLUMNS)
+                writer.writerows(
+                    [index, row[0], row[1], score, row[3]]
+                    for index, (row, score) in enumerate(zip(score_data, scores))
+                )
 
     logging.info("Stored FAIR assessment results to: %s" % file_path)
 
@@ -562,40 +713,64 @@ def main():
     logger.addHandler(handler)
 
     url = args.api_endpoint
-    if args.repository == None:
-        response = requests.get(
-            "http://localhost:9090/v1.0/endpoints?plugin=" + args.plugin
-        )
-        if response.status_code == 404:
-            print(
-                "Input plugin not found. Look for plugins in the plugins folder. The accepted plugins for this script are: "
-                + str(response.json().keys())
-            )
-            return "Input plugin not found"
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        # Probe the API port while the plugin's metadata endpoint is fetched
+        is_api_running = executor.submit(wait_for_port, "127.0.0.1", 9090)
+        endpoint_response = None
+        if args.repository == None:
+            metadata_endpoint = None
+            if not args.no_cache:
+                metadata_endpoint = read_cached_endpoint(args.plugin)
+            if metadata_endpoint is not None:
+                logging.debug(
+                    "Using cached metadata endpoint for plugin %s: %s"
+                    % (args.plugin, metadata_endpoint)
+                )
+            else:
+                endpoint_response = executor.submit(
+                    SESSION.get,
+                    "http://localhost:9090/v1.0/endpoints?plugin=" + args.plugin,
+                )
         else:
-            metadata_endpoint = response.json()
+            metadata_endpoint = args.repository
 
-    else:
-        metadata_endpoint = args.repository
+        if not is_api_running.result():
+            logging.error("FAIR-eva API was not able to launch: exiting")
+            sys.exit(-1)
+        logging.debug("FAIR-eva API running on port 9090")
 
-    is_api_running = False
+        if endpoint_response is not None:
+            try:
+                response = endpoint_response.result()
+            except requests.RequestException as e:
+                # The request may have given up before the API started listening
+                logging.error("FAIR-eva API was not able to launch: exiting")
+                logging.debug(e)
+                sys.exit(-1)
+            if not response.ok and response.status_code != 404:
+                logging.error("Error returned by FAIR-EVA API: %s" % response.reason)
+                logging.debug(response.text)
+                sys.exit(response.status_code)
+            metadata_endpoint = json_codec.loads(response.content)
+            # Unknown (or empty) plugin names get the dict of all plugin endpoints
+            if not isinstance(metadata_endpoint, str):
+                accepted_plugins = (
+                    metadata_endpoint.keys()
+                    if isinstance(metadata_endpoint, dict)
+                    else []
+                )
+                print(
+                    "Input plugin not found. Look for plugins in the plugins folder. The accepted plugins for this script are: "
+                    + str(accepted_plugins)
+                )
+                return "Input plugin not found"
+            if not args.no_cache:
+                write_cached_endpoint(args.plugin, metadata_endpoint)
 
-    for i in range(1, 5):
-        if is_port_open():
-            logging.debug("FAIR-eva API running on port 9090")
-            is_api_running = True
-            break
-        else:
-            logging.debug("FAIR-eva API not running: port 9090 not open")
-            logging.debug("Sleeping for 5 seconds..")
-            time.sleep(5)
-    if not is_api_running:
-        logging.error("FAIR-eva API was not able to launch: exiting")
-        sys.exit(-1)
     if args.search:
-        identifier = search(args.search)
+        title, identifier = search(args.search)
     else:
-        identifier = args.id
+        title, identifier = None, args.id
 
     headers = {"Content-Type": "application/json"}
     data = {
@@ -605,19 +780,17 @@ def main():
         "lang": "EN",
     }
 
-    if search == True:
+    if title:
         logging.info('Evaluating "' + str(title) + '" with id: ' + identifier)
     else:
         logging.info("Evaluating item with id : " + identifier)
 
-    r = requests.post(url, data=json.dumps(data), headers=headers)
+    r = SESSION.post(url, data=json_codec.dumps(data), headers=headers)
     if not r.ok:
         logging.error("Error returned by FAIR-EVA API: %s" % r.reason)
         logging.debug(r.text)
         sys.exit(r.status_code)
-    logging.debug("FAIR results (raw) from FAIR-EVA: %s" % r.json())
-    results_all = r.json()
-    results = results_all.get(identifier, {})
+    results, evaluator_logs = parse_results(r, identifier, with_logs=args.logs)
     logging.debug("FAIR results for (meta)data ID: %s" % results)
 
     score_results = collect_score_data(results)
@@ -631,7 +804,7 @@ def main():
         print_table(score_results, totals=totals)
     if args.logs:
         print("\n----- Evaluator logs -----")
-        for line in results_all["evaluator_logs"]:
+        for line in evaluator_logs:
             print(line)
 
     if args.store_feather:
@@ -640,4 +813,5 @@ def main():
         store(identifier, score_results, file_format="csv")
 
 
-main()
+if __name__ == "__main__":
+    main()